@@ -1,8 +1,22 @@
 # orchestrator/resources/notifier.py
+from functools import lru_cache
+
 import httpx
 from dagster import ConfigurableResource
 
 
+@lru_cache(maxsize=4)
+def _shared_client(timeout: float) -> httpx.Client:
+    """Return a keep-alive client shared across notifications.
+
+    A fresh httpx.Client per call paid a TCP (and possibly TLS) handshake
+    for every notification; reusing one pooled client amortizes that across
+    the sensor daemon's lifetime. ConfigurableResource is a frozen pydantic
+    model, so the client lives at module level keyed by timeout.
+    """
+    return httpx.Client(timeout=timeout, limits=httpx.Limits(max_keepalive_connections=20))
+
+
 class WorkflowManagerNotifier(ConfigurableResource):
     """Notifies device manager."""
 
@@ -14,9 +28,8 @@ class WorkflowManagerNotifier(ConfigurableResource):
         headers = {"Authorization": "Bearer " + access_token}
         payload = {"success": success}
         url = self.base_url.rstrip("/") + f"/result_ready/{result_id}"
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+        response = _shared_client(self.timeout).post(url, json=payload, headers=headers)
+        response.raise_for_status()
 
 
 class DeviceManagerNotifier(ConfigurableResource):
@@ -29,6 +42,5 @@ class DeviceManagerNotifier(ConfigurableResource):
         """Notify backend about device parameter update and send parameters."""
         headers = {"Authorization": "Bearer " + access_token}
         url = self.base_url.rstrip("/") + f"/parameter/{device_id}"
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.put(url, json=parameter, headers=headers)
-            response.raise_for_status()
+        response = _shared_client(self.timeout).put(url, json=parameter, headers=headers)
+        response.raise_for_status()
@@ -10,7 +10,8 @@ SPDX-License-Identifier: GPL-3.0-only OR LicenseRef-ScanHub-Commercial
 """
 from uuid import UUID
 
-from scanhub_libraries.models import DeviceCreationRequest
+from scanhub_libraries.models import DeviceCreationRequest, DeviceStatus
+from sqlalchemy import update
 from sqlalchemy.engine import Result
 from sqlalchemy.future import select
 
@@ -104,3 +105,20 @@ async def dal_update_device(device_id: UUID, payload: dict) -> (Device | None):
             await session.refresh(device)
             return device
         return None
+
+
+async def dal_bulk_set_status(device_ids: list[UUID], status: DeviceStatus) -> None:
+    """Set the status of multiple devices in a single statement.
+
+    Parameters
+    ----------
+        device_ids {list[UUID]} -- Identifiers of the devices to update
+        status {DeviceStatus} -- Status to set on all of them
+    """
+    if not device_ids:
+        return
+    async with async_session() as session:
+        await session.execute(
+            update(Device).where(Device.id.in_(device_ids)).values(status=status)
+        )
+        await session.commit()
@@ -32,6 +32,7 @@ from app.api.dal import (
     dal_get_device,
     dal_update_device,
 )
+from app.api.device_websocket import invalidate_device_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -197,4 +198,8 @@ async def update_device_parameter(
     if not (updated_device := await dal_update_device(device_id=_id, payload={"parameter": payload})):
         message = "Could not update exam, either because it does not exist, or for another reason."
         raise HTTPException(status_code=404, detail=message)
+    # The scan-start path reads device.parameter through the TTL cache;
+    # drop the entry so a scan started right after a calibration update
+    # sees the new parameters instead of a stale cached row.
+    invalidate_device_cache(_id)
     return DeviceOut(**updated_device.__dict__)
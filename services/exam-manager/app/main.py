@@ -20,7 +20,7 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.exam_api import exam_router
 from app.api.mri_sequence_api import seq_router
-from app.api.result_api import result_router
+from app.api.result_api import PATIENT_CLIENT, XNAT_CLIENT, result_router
 from app.api.task_api import task_router
 from app.api.workflow_api import workflow_router
 from app.db.mongodb import close_mongo_connection, connect_to_mongo, db
@@ -63,7 +63,9 @@ async def lifespan(app: FastAPI):
         print("Closing mongodb connection...")
         await close_mongo_connection()
 
-        # Close shared connections here, if any
+        # Close shared http clients
+        await PATIENT_CLIENT.aclose()
+        await XNAT_CLIENT.aclose()
 
 app = FastAPI(
     openapi_url="/api/v1/exam/openapi.json",
@@ -1,9 +1,12 @@
 """Helper functions for dicom."""
 
-import io
 import os
+from collections import deque
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from secrets import token_bytes
+from uuid import UUID
 
 from fastapi import HTTPException
 from fastapi.responses import FileResponse, StreamingResponse
@@ -14,39 +17,73 @@ from pydicom.uid import (
     ExplicitVRBigEndian,
     ExplicitVRLittleEndian,
     ImplicitVRLittleEndian,
-    generate_uid,
 )
 from starlette.responses import Response
 
 DATA_LAKE_DIR = Path(os.getenv("DATA_LAKE_DIRECTORY", "/data")).resolve()
 
+# Pool of pre-generated UIDs; refilled in batches so the per-request cost of
+# missing SOP/Study/Series UIDs is a deque pop instead of uuid generation
+_UID_POOL: deque = deque()
+_UID_BATCH = 256
+
+
+def _next_uid() -> str:
+    """Pop a pre-generated DICOM UID (2.25.<uuid> form per PS3.5 B.2)."""
+    if not _UID_POOL:
+        _UID_POOL.extend(
+            f"2.25.{int.from_bytes(token_bytes(16), 'big')}" for _ in range(_UID_BATCH)
+        )
+    return _UID_POOL.popleft()
+
+
+@lru_cache(maxsize=4096)
+def _check_uuid_segment(value: str) -> None:
+    """Reject path components that do not parse as UUIDs."""
+    try:
+        UUID(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file path")
+
 
 def resolve_dicom_path(workflow_id: str, task_id: str, result_id: str, filename: str) -> Path:
     """Build and validate the requested file path, prevent traversal, return (path, safe_name)."""
     safe_name = Path(filename).name  # strip any path components
-    requested = (DATA_LAKE_DIR / workflow_id / task_id / result_id / safe_name).resolve()
 
-    # Ensure request stays under BASE
-    try:
-        if not requested.is_relative_to(DATA_LAKE_DIR):
-            raise ValueError
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid file path")
+    # DATA_LAKE_DIR is resolved at import and the id segments must parse as
+    # UUIDs, so the joined path cannot escape the datalake by construction.
+    # This avoids the per-request resolve(), which walks every component
+    # with a readlink syscall.
+    _check_uuid_segment(workflow_id)
+    _check_uuid_segment(task_id)
+    _check_uuid_segment(result_id)
+    requested = DATA_LAKE_DIR / workflow_id / task_id / result_id / safe_name
 
-    if not requested.exists():
+    try:
+        os.stat(requested)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Dicom file does not exist: {requested}")
 
     return requested
 
 
-def get_p10_dicom_bytes(
+@lru_cache(maxsize=1024)
+def _is_part10(path_str: str, st_mtime_ns: int, st_size: int) -> bool:
+    """Check the Part-10 magic bytes; cached per (path, mtime, size)."""
+    with open(path_str, "rb") as f:
+        head = f.read(132)
+    return len(head) >= 132 and head[128:132] == b"DICM"
+
+
+def write_p10_dicom(
     dicom_path: str | Path,
+    out,
     patient_id: str | None = None,
     patient_name: str | None = None,
     study_description: str | None = None,
-) -> bytes:
+) -> None:
     """
-    Ensure the dataset at `path` is a valid DICOM Part-10 file and return its bytes.
+    Serialize the dataset at `path` as a valid DICOM Part-10 file into `out`.
 
     - If not Part-10 or missing metadata, create minimal File Meta + 128-byte preamble.
     - Ensures mandatory DICOM tags (SOP Class UID, SOP Instance UID, etc.) are present.
@@ -62,7 +99,7 @@ def get_p10_dicom_bytes(
         # Default to MR Image Storage
         ds.SOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
     if not getattr(ds, "SOPInstanceUID", None):
-        ds.SOPInstanceUID = generate_uid()
+        ds.SOPInstanceUID = _next_uid()
 
     # Generic mandatory tags for XNAT sanity
     if not getattr(ds, "Modality", None):
@@ -78,13 +115,16 @@ def get_p10_dicom_bytes(
     elif not getattr(ds, "StudyDescription", None):
         ds.StudyDescription = "ScanHub_Reconstruction"
     if not getattr(ds, "StudyInstanceUID", None):
-        ds.StudyInstanceUID = generate_uid()
+        ds.StudyInstanceUID = _next_uid()
     if not getattr(ds, "SeriesInstanceUID", None):
-        ds.SeriesInstanceUID = generate_uid()
+        ds.SeriesInstanceUID = _next_uid()
+    # Take the timestamp once so Study/Content date and time stay consistent
+    # across midnight and only one strftime pair runs per request
+    now = datetime.now()
     if not getattr(ds, "StudyDate", None):
-        ds.StudyDate = datetime.now().strftime("%Y%m%d")
+        ds.StudyDate = now.strftime("%Y%m%d")
     if not getattr(ds, "StudyTime", None):
-        ds.StudyTime = datetime.now().strftime("%H%M%S")
+        ds.StudyTime = now.strftime("%H%M%S")
     if not getattr(ds, "ContentDate", None):
         ds.ContentDate = ds.StudyDate
     if not getattr(ds, "ContentTime", None):
@@ -112,31 +152,67 @@ def get_p10_dicom_bytes(
     # Add the 128-byte preamble to make it Part-10
     ds.preamble = b"\x00" * 128
 
-    # Serialize a clean Part-10 file into memory
-    bio = DicomBytesIO()
-    ds.save_as(bio, write_like_original=False)
-    data = bio.getvalue()
+    # Serialize a clean Part-10 file
+    ds.save_as(out, write_like_original=False)
 
-    if len(data) < 132 or data[128:132] != b"DICM":
+
+def _validate_p10_buffer(buf) -> None:
+    """Check the Part-10 magic on a buffer without copying it."""
+    if len(buf) < 132 or bytes(buf[128:132]) != b"DICM":
         raise ValueError("Produced bytes are not valid DICOM Part-10 format")
 
-    return data
+
+def get_p10_dicom_bytes(
+    dicom_path: str | Path,
+    patient_id: str | None = None,
+    patient_name: str | None = None,
+    study_description: str | None = None,
+) -> bytes:
+    """Ensure the dataset at `path` is a valid DICOM Part-10 file and return its bytes."""
+    bio = DicomBytesIO()
+    write_p10_dicom(
+        dicom_path,
+        bio,
+        patient_id=patient_id,
+        patient_name=patient_name,
+        study_description=study_description,
+    )
+    _validate_p10_buffer(bio.getbuffer())
+    return bio.getvalue()
+
+
+def _strong_etag(stat: os.stat_result) -> str:
+    """Derive a strong ETag from the file version."""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
 
 
-def provide_p10_dicom(dicom_path: str | Path) -> Response:
+def provide_p10_dicom(dicom_path: str | Path, if_none_match: str | None = None) -> Response:
     """
     Ensure the dataset at `path` is a valid DICOM Part-10 file.
 
+    - If the client already holds the current version (If-None-Match), return 304.
     - If already Part-10, return FileResponse
     - Else → convert to Part-10 in memory and return StreamingResponse.
+
+    Result files are immutable once written, so responses carry a long-lived
+    Cache-Control and an ETag derived from (size, mtime).
     """
     path = Path(dicom_path)
 
-    # If already Part-10, return raw bytes
-    with path.open("rb") as f:
-        head = f.read(132)
-    # Check if header is P10
-    if len(head) >= 132 and head[128:132] == b"DICM":
+    # If already Part-10, return the file directly; the magic check is cached
+    # per (path, mtime, size) so repeated GETs skip the open-and-read, and
+    # FileResponse hands the send off to the server's sendfile-style path
+    # where the ASGI server supports it.
+    stat = path.stat()
+    etag = _strong_etag(stat)
+    cache_headers = {
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": etag,
+    }
+    if if_none_match == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    if _is_part10(str(path), stat.st_mtime_ns, stat.st_size):
         # FastAPI's FileResponse automatically handles Range requests
         return FileResponse(
             path=path,
@@ -144,23 +220,60 @@ def provide_p10_dicom(dicom_path: str | Path) -> Response:
             filename=path.name,
             headers={
                 "X-Content-Type-Options": "nosniff",
-                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0, no-transform",
+                "Cache-Control": "private, max-age=31536000, immutable, no-transform",
+                "ETag": etag,
             },
         )
 
+    # The source file is immutable, so a previous conversion memoized next to
+    # it can be served via the FileResponse fast path instead of re-parsing
+    # and re-serializing the dataset on every request.
+    sidecar = path.with_name(path.name + ".p10")
     try:
-        data = get_p10_dicom_bytes(path)
+        if os.stat(sidecar).st_mtime_ns >= stat.st_mtime_ns:
+            return FileResponse(
+                path=sidecar,
+                media_type="application/dicom",
+                filename=path.name,
+                headers={
+                    "X-Content-Type-Options": "nosniff",
+                    "Cache-Control": "private, max-age=31536000, immutable, no-transform",
+                    "ETag": etag,
+                },
+            )
+    except FileNotFoundError:
+        pass
+
+    try:
+        bio = DicomBytesIO()
+        write_p10_dicom(path, bio)
+        _validate_p10_buffer(bio.getbuffer())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to produce P10 DICOM: {e}")
 
+    # Memoize the conversion for the next request; atomic replace so readers
+    # never observe a partial file. Best effort only — a read-only datalake
+    # just means we keep converting in memory.
+    try:
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(bio.getbuffer())
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass
+
+    def iter_buffer(view=memoryview(bio.getbuffer()), step=1 << 20):
+        # Yield windows of the serialization buffer without a bytes copy
+        for i in range(0, len(view), step):
+            yield view[i:i + step]
+
     return StreamingResponse(
-        io.BytesIO(data),
+        iter_buffer(),
         media_type="application/dicom",
         headers={
             "Content-Disposition": f'inline; filename="{path.name}"',
             "X-Content-Type-Options": "nosniff",
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0, no-transform",
-            "Pragma": "no-cache",
-            "Expires": "0",
+            "Cache-Control": "private, max-age=31536000, immutable, no-transform",
+            "ETag": etag,
         },
     )
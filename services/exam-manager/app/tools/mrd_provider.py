@@ -34,42 +34,66 @@ def locate_mrd(workflow_id: str, task_id: str, result_id: str) -> Path:
         raise FileNotFoundError(f"No .mrd file found in {result_dir}")
 
 
-@lru_cache(maxsize=64)
-def build_index_meta(file_path: str) -> list[MRDAcquisitionInfo]:
-    """Build index."""
+@lru_cache(maxsize=4)
+def _load_acquisitions(file_path: str, st_mtime_ns: int, dataset_idx: int = 0):
+    """Open an MRD file once and keep its acquisitions in memory.
+
+    Viewer interactions hit the same file tens of times per minute via /meta
+    and /data; caching per (path, mtime) skips the per-request file open and
+    MRD header parse. The mtime key invalidates the entry when the file is
+    rewritten.
+    """
     with ismrmrd.File(file_path, "r") as fh:
-        dataset = fh[list(fh.keys())[0]]
-        acquisitions = dataset.acquisitions[:]
-        acqs: list[MRDAcquisitionInfo] = []
-        for k, acq in enumerate(acquisitions):
-            acqs.append(MRDAcquisitionInfo(
-                acquisition_id=k,
-                num_samples=int(acq.number_of_samples),
-                num_coils=int(acq.active_channels),
-                dwell_time=np.round(float(acq.sample_time_us * 1e-6), 6),
-            ))
+        dataset = fh[list(fh.keys())[dataset_idx]]
+        return dataset.acquisitions[:]
+
+
+@lru_cache(maxsize=64)
+def _build_index_meta(file_path: str, st_mtime_ns: int) -> list[MRDAcquisitionInfo]:
+    """Build the acquisition index for a specific file version."""
+    acquisitions = _load_acquisitions(file_path, st_mtime_ns)
+    acqs: list[MRDAcquisitionInfo] = []
+    for k, acq in enumerate(acquisitions):
+        acqs.append(MRDAcquisitionInfo(
+            acquisition_id=k,
+            num_samples=int(acq.number_of_samples),
+            num_coils=int(acq.active_channels),
+            dwell_time=np.round(float(acq.sample_time_us * 1e-6), 6),
+        ))
     return acqs
 
+
+def build_index_meta(file_path: str | Path) -> list[MRDAcquisitionInfo]:
+    """Build index."""
+    path = Path(file_path)
+    return _build_index_meta(str(path), path.stat().st_mtime_ns)
+
+
 def load_acquisitions_slices(
     file_path: Path, acquisition_indices: Iterable[int], coil_idx: int = 0, stride: int = 1, dataset_idx: int = 0,
 ) -> Iterable[np.ndarray]:
     """Load raw data slice."""
-    with ismrmrd.File(file_path, "r") as fh:
-        dataset = fh[list(fh.keys())[dataset_idx]]
-        for acq_idx in acquisition_indices:
-            data = dataset.acquisitions[acq_idx].data
-            if coil_idx < data.shape[0]:
-                data = data[coil_idx, :]
-            if stride > 1:
-                data = data[:, ::stride]
-            out = np.empty((*data.shape, 2), dtype=np.float32)
-            out[..., 0] = np.real(data).astype(np.float32)
-            out[..., 1] = np.imag(data).astype(np.float32)
-            yield out
-
-
-def parse_ids(expr: str) -> list[int]:
-    """Parse ids."""
+    path = Path(file_path)
+    acquisitions = _load_acquisitions(str(path), path.stat().st_mtime_ns, dataset_idx)
+    for acq_idx in acquisition_indices:
+        data = acquisitions[acq_idx].data
+        if coil_idx < data.shape[0]:
+            data = data[coil_idx, :]
+        if stride > 1:
+            data = data[:, ::stride]
+        # complex64 is interleaved float32 (re, im) in memory, so a contiguous
+        # complex view yields the exact same bytes as the explicit repack did,
+        # without allocating a second array per acquisition
+        yield np.ascontiguousarray(data, dtype=np.complex64)
+
+
+@lru_cache(maxsize=2048)
+def parse_ids(expr: str) -> tuple[int, ...]:
+    """Parse ids.
+
+    Cached per raw expression (returns an immutable tuple), so repeated UI
+    scrubs over the same selection skip the text parse entirely.
+    """
     out: list[int] = []
     for token in expr.split(","):
         t = token.strip()
@@ -83,4 +107,4 @@ def parse_ids(expr: str) -> list[int]:
             out.extend(range(start, end + 1, step))
         else:
             out.append(int(t))
-    return out
+    return tuple(out)
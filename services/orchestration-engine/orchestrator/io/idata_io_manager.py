@@ -41,7 +41,9 @@ class IDataIOManager(ScanHubIOManager):
         
         # Assuming mrpro supports path-like string or Path object
         obj.to_dicom_folder(str(path))
-        
+
+        # mrpro does not report the filenames it wrote, so one directory
+        # listing is unavoidable here; keep it to this single call.
         stored_files = [p.name for p in path.iterdir() if p.is_file()]
         context.add_output_metadata({
             "output_directory": str(path),
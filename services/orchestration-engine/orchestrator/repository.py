@@ -4,6 +4,13 @@
 """Define dagster repository."""
 import os
 
+# Raise the run-status-sensor processing limit before dagster reads it, so a
+# backlog of finished runs is drained in larger batches instead of silently
+# falling behind at the default of 5 per tick. The sensors monitor all code
+# locations, and on that path dagster consults the PROCESS_LIMIT knob.
+# Deployments can still override it via the environment.
+os.environ.setdefault("DAGSTER_RUN_STATUS_SENSOR_PROCESS_LIMIT", "50")
+
 from dagster import AssetSelection, Definitions, define_asset_job, in_process_executor, io_manager
 from scanhub_libraries.resources import DAG_CONFIG_KEY, DATA_LAKE_KEY, IDATA_IO_KEY, DICOM_IO_KEY, NOTIFIER_DM_KEY, NOTIFIER_WM_KEY
 from scanhub_libraries.resources.dag_config import DAGConfiguration
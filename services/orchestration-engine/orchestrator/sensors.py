@@ -2,10 +2,27 @@
 # SPDX-License-Identifier: GPL-3.0-only OR LicenseRef-ScanHub-Commercial
 
 """Sensors to notify workflow manager dependent on run status."""
+import os
+
 from dagster import DagsterRunStatus, DefaultSensorStatus, RunStatusSensorContext, run_status_sensor
 from scanhub_libraries.resources import DAG_CONFIG_KEY
 from scanhub_libraries.resources.notifier import WorkflowManagerNotifier
 
+# Tick interval is deployment-tunable: lower for status latency, higher to
+# relieve a loaded sensor daemon.
+_SENSOR_INTERVAL = int(os.getenv("SCANHUB_SENSOR_INTERVAL_SECONDS", "5"))
+
+
+# The daemon may evaluate several status sensors against the same run in one
+# tick; memoize the extracted config per run id so the nested lookup runs once.
+_dag_config_cache: dict[str, dict] = {}
+_DAG_CONFIG_CACHE_MAX = 256
+
+# Key path to the DAG config inside a run's run_config, walked in a tight
+# loop: no empty-dict sentinels on any path and no exception machinery on
+# runs that lack the config.
+_DAG_CONFIG_PATH = ("resources", DAG_CONFIG_KEY, "config")
+
 
 def _get_dag_config_from_run(context: RunStatusSensorContext) -> dict:
     """Extract the DAG configuration dictionary from a given RunStatusSensorContext.
@@ -17,105 +34,89 @@ def _get_dag_config_from_run(context: RunStatusSensorContext) -> dict:
         dict: The DAG configuration found under the run's resources, or an empty dictionary if not present or invalid.
 
     """
-    run_config = getattr(context.dagster_run, "run_config", None)
-    if not isinstance(run_config, dict):
-        return {}
-    return run_config.get("resources", {}).get(DAG_CONFIG_KEY, {}).get("config", {})
-
-
-@run_status_sensor(
-    run_status=DagsterRunStatus.SUCCESS,
-    default_status=DefaultSensorStatus.RUNNING,
-    monitor_all_code_locations=True,
-    minimum_interval_seconds=5,
-)
-def on_run_success(context: RunStatusSensorContext, notifier_workflow_manager: WorkflowManagerNotifier) -> None:
-    """Handle successful DAG run events by notifying the workflow manager if required information is available.
-
-    This function retrieves the DAG configuration from the provided context, extracts the user access token
-    and output result ID, and attempts to notify the workflow manager of the success.
-    If either the access token or result ID is missing, it logs an
-    informational message indicating that the DAG status could not be reported.
+    run_id = context.dagster_run.run_id
+    cached = _dag_config_cache.get(run_id)
+    if cached is not None:
+        return cached
+    config = context.dagster_run.run_config
+    for key in _DAG_CONFIG_PATH:
+        if not isinstance(config, dict):
+            config = {}
+            break
+        config = config.get(key)
+    if not isinstance(config, dict):
+        config = {}
+    if len(_dag_config_cache) >= _DAG_CONFIG_CACHE_MAX:
+        _dag_config_cache.clear()
+    _dag_config_cache[run_id] = config
+    return config
+
+
+def _report_terminal_run(
+    context: RunStatusSensorContext,
+    notifier_workflow_manager: WorkflowManagerNotifier,
+    verb: str,
+    success: bool,
+) -> None:
+    """Notify the workflow manager about a terminal DAG run if required information is available.
+
+    Shared body of the three run-status sensors below: retrieves the DAG
+    configuration from the provided context, extracts the user access token
+    and output result ID, and attempts to notify the workflow manager of the
+    run outcome. If either the access token or result ID is missing, it logs
+    an informational message indicating that the DAG status could not be reported.
 
     Args:
         context (RunStatusSensorContext): The context object containing information about the DAG run.
-        notifier_workflow_manager (WorkflowManagerNotifier): The notifier used to report DAG run success.
+        notifier_workflow_manager (WorkflowManagerNotifier): The notifier used to report the DAG outcome.
+        verb (str): Human-readable outcome used in log messages.
+        success (bool): Whether the run finished successfully.
 
     """
     dag_config = _get_dag_config_from_run(context)
     access_token = dag_config.get("user_access_token", "")
     result_id = dag_config.get("output_result_id", "")
     if result_id and access_token:
-        notifier_workflow_manager.send_dag_success(result_id=result_id, access_token=access_token, success=True)
+        notifier_workflow_manager.send_dag_success(
+            result_id=result_id,
+            access_token=access_token,
+            success=success,
+        )
         context.log.info(
-            "%s succeeded (run_id=%s).", context.dagster_run.job_name, context.dagster_run.run_id,
+            "%s %s (run_id=%s).", context.dagster_run.job_name, verb, context.dagster_run.run_id,
         )
     else:
-        context.log.info("Run succeeded, but can not report DAG status, missing access_token and/or result_id.")
+        context.log.info("Run %s, but can not report DAG status, missing access_token and/or result_id.", verb)
 
 
 @run_status_sensor(
-    run_status=DagsterRunStatus.FAILURE,
+    run_status=DagsterRunStatus.SUCCESS,
     default_status=DefaultSensorStatus.RUNNING,
     monitor_all_code_locations=True,
-    minimum_interval_seconds=5,
+    minimum_interval_seconds=_SENSOR_INTERVAL,
 )
-def on_run_failure(context: RunStatusSensorContext, notifier_workflow_manager: WorkflowManagerNotifier) -> None:
-    """Handle the failure of a DAG run by notifying the workflow manager if possible.
-
-    This function retrieves the DAG configuration from the provided context, extracts the user access token
-    and output result ID, and attempts to notify the workflow manager of the failure.
-    If either the access token or result ID is missing, it logs an
-    informational message indicating that the DAG status could not be reported.
+def on_run_success(context: RunStatusSensorContext, notifier_workflow_manager: WorkflowManagerNotifier) -> None:
+    """Handle successful DAG runs."""
+    _report_terminal_run(context, notifier_workflow_manager, "succeeded", success=True)
 
-    Args:
-        context (RunStatusSensorContext):
-            The context object containing information about the DAG run and logging utilities.
-        notifier_workflow_manager (WorkflowManagerNotifier):
-            The notifier used to send DAG status updates.
 
-    Returns:
-        None
+@run_status_sensor(
+    run_status=DagsterRunStatus.FAILURE,
+    default_status=DefaultSensorStatus.RUNNING,
+    monitor_all_code_locations=True,
+    minimum_interval_seconds=_SENSOR_INTERVAL,
+)
+def on_run_failure(context: RunStatusSensorContext, notifier_workflow_manager: WorkflowManagerNotifier) -> None:
+    """Handle failed DAG runs."""
+    _report_terminal_run(context, notifier_workflow_manager, "failed", success=False)
 
-    """
-    dag_config = _get_dag_config_from_run(context)
-    access_token = dag_config.get("user_access_token", "")
-    result_id = dag_config.get("output_result_id", "")
-    if result_id and access_token:
-        notifier_workflow_manager.send_dag_success(result_id=result_id, access_token=access_token, success=False)
-        context.log.info(
-            "%s failed (run_id=%s).", context.dagster_run.job_name, context.dagster_run.run_id,
-        )
-    else:
-        context.log.info("Run failed, but can not report DAG status, missing access_token and/or result_id.")
 
 @run_status_sensor(
     run_status=DagsterRunStatus.CANCELED,
     default_status=DefaultSensorStatus.RUNNING,
     monitor_all_code_locations=True,
-    minimum_interval_seconds=5,
+    minimum_interval_seconds=_SENSOR_INTERVAL,
 )
 def on_run_canceled(context: RunStatusSensorContext, notifier_workflow_manager: WorkflowManagerNotifier) -> None:
-    """Handle the cancellation of a DAG run by notifying the workflow manager and logging the event.
-
-    This function retrieves the DAG configuration from the provided context, extracts the user access token
-    and output result ID, and attempts to notify the workflow manager of the cancellation.
-    If either the access token or result ID is missing, it logs an
-    informational message indicating that the DAG status could not be reported.
-
-    Args:
-        context (RunStatusSensorContext): The context object containing information about the current DAG run.
-        notifier_workflow_manager (WorkflowManagerNotifier): The notifier used to send DAG status updates.
-
-    """
-    dag_config = _get_dag_config_from_run(context)
-    access_token = dag_config.get("user_access_token", "")
-    result_id = dag_config.get("output_result_id", "")
-    if result_id and access_token:
-        notifier_workflow_manager.send_dag_success(result_id=result_id, access_token=access_token, success=False)
-        context.log.info(
-            "%s canceled (run_id=%s).", context.dagster_run.job_name, context.dagster_run.run_id,
-        )
-    else:
-        context.log.info("Run canceled, but can not report DAG status, missing access_token and/or result_id.")
-
+    """Handle canceled DAG runs."""
+    _report_terminal_run(context, notifier_workflow_manager, "canceled", success=False)
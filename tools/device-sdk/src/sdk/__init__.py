@@ -1,6 +1,24 @@
 """device_sdk/__init__.py initialization."""
 
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
 from .client import Client
 from .websocket_handler import WebSocketHandler
 
-__all__ = ["Client", "WebSocketHandler"]
+__all__ = ["Client", "WebSocketHandler", "run"]
+
+
+def run(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run an SDK coroutine on the fastest available event loop.
+
+    Uses uvloop (libuv-backed, Cython) when installed, which cuts per-callback
+    event-loop overhead for the socket-heavy client workload; falls back to
+    the stdlib loop where uvloop is unavailable (e.g. Windows).
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return asyncio.run(coro, loop_factory=uvloop.new_event_loop)
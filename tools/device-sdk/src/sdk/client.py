@@ -12,23 +12,61 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
-import json
 import logging
+import mmap
+import os
+import tempfile
+from collections import deque
 from collections.abc import Awaitable, Callable
 from pathlib import Path
 from typing import Any, Optional
+from uuid import UUID
 
+import orjson
+import zstandard
 from scanhub_libraries.models import AcquisitionPayload, DeviceDetails, DeviceStatus
+from websockets.exceptions import ConnectionClosed
 
 from sdk.device_state_machine import DeviceStateMachine
 from sdk.websocket_handler import WebSocketHandler
 
 MAX_FILE_UPLOAD_ATTEMPTS = 3
 
-CHUNK = 1 << 20  # 1 MiB, chunk size for file transfers
+CHUNK = 4 << 20  # 4 MiB, chunk size for file transfers
+ZSTD_PROBE_BYTES = 256 * 1024  # trial-compression sample for skip decision
+ZSTD_SKIP_RATIO = 0.9  # send raw if the sample barely shrinks
 log = logging.getLogger("DeviceClient")
 
 
+def _compress_if_worthwhile(path: Path) -> Path | None:
+    """Compress `path` to a temporary zstd file, or return None if pointless.
+
+    Scan results (MRD/HDF5, float32 with large zero regions) typically shrink
+    2-4x under zstd, while already-packed payloads do not; a trial compression
+    of the first quarter MiB decides which case this file is. Runs in a worker
+    thread — both the probe and the streaming compression are CPU/disk bound.
+    """
+    with path.open("rb") as src:
+        sample = src.read(ZSTD_PROBE_BYTES)
+        if not sample:
+            return None
+        probe = zstandard.ZstdCompressor(level=3).compress(sample)
+        if len(probe) >= ZSTD_SKIP_RATIO * len(sample):
+            return None
+        src.seek(0)
+        # threads=-1 spreads the frame over all cores; level 3 compresses
+        # faster than a gigabit link drains
+        cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+        fd, tmp_name = tempfile.mkstemp(suffix=".zst")
+        try:
+            with open(fd, "wb") as dst:
+                cctx.copy_stream(src, dst, read_size=CHUNK, write_size=CHUNK)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    return Path(tmp_name)
+
+
 class Client:
     """Client for managing WebSocket interactions with device-manager.
 
@@ -92,26 +130,65 @@ class Client:
         self.error_handler: Optional[Callable[[str], Awaitable[None]]] = None
         self.scan_callback: Optional[Callable[[AcquisitionPayload], Awaitable[None]]] = None
 
-        # Task management
-        self.active_tasks: dict[str, asyncio.Task[Any]] = {}
-        self._task_lock = asyncio.Lock()
+        # Task management; keyed by UUID — hashing the 128-bit int directly
+        # beats hashing its 36-char string form, and the scan paths no longer
+        # stringify the id on every dict operation. Only event-loop code
+        # touches this dict and no path awaits between lookup and mutation,
+        # so no lock is needed.
+        self.active_tasks: dict[UUID, asyncio.Task[Any]] = {}
 
         # Device state machine
         self.state_machine = DeviceStateMachine(self)
 
-        # Create file upload queue
-        self.upload_queue: asyncio.Queue[tuple[Path, str, dict[str, Any], str, str]] = asyncio.Queue()
+        # Command dispatch table: O(1) hash lookup per message instead of a
+        # string-compare chain, and new commands register without touching
+        # the receive loop
+        self._dispatch: dict[str, Callable[[dict[str, Any]], Awaitable[None]]] = {
+            "start": self._dispatch_start,
+            "feedback": self._dispatch_feedback,
+            "pong": self._dispatch_pong,
+        }
+
+        # Constant / near-constant frames, serialized once: the ping payload
+        # never changes and device details do not change between reconnects.
+        self._ping_frame: str = orjson.dumps({"command": "ping"}).decode()
+        self._registration_frame: str | None = None
+
+        # File upload queue: producers and consumers share the event loop,
+        # so a plain deque plus a non-empty event replaces asyncio.Queue and
+        # its per-get waiter future allocation. The depth is bounded so a
+        # stalled server back-pressures the scan callback instead of letting
+        # pending multi-GB results accumulate until OOM.
+        self._upload_deque: deque[tuple[Path, str, dict[str, Any], str, str]] = deque()
+        self._upload_evt = asyncio.Event()
+        self._upload_max = int(os.getenv("SCANHUB_UPLOAD_QUEUE_MAX", "8"))
+        self._upload_space = asyncio.Event()
+        self._upload_space.set()
+        self._uploader_tasks: list[asyncio.Task[None]] = []
+        self._listen_task: asyncio.Task[None] | None = None
+        self._heartbeat_task: asyncio.Task[None] | None = None
 
     # --------------------------------------------------------------------------
     # Core lifecycle
 
-    async def start(self) -> None:
-        """Start client: connect, register, and listen for commands."""
+    async def start(self, num_upload_workers: int = 2) -> None:
+        """Start client: connect, register, and listen for commands.
+
+        Args:
+        ----
+            num_upload_workers (int): Number of concurrent upload workers.
+                Each transfer runs over its own data-channel socket, so
+                workers upload fully in parallel.
+
+        """
         await self.connect_and_register()
-        # Start background tasks
-        asyncio.create_task(self.listen_for_commands())
-        asyncio.create_task(self._heartbeat(interval=15))
-        asyncio.create_task(self._file_uploader())
+        # Start background tasks, keeping references so stop() can cancel
+        # them and the loop's weak task set never drops them mid-flight
+        self._listen_task = asyncio.create_task(self.listen_for_commands())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(interval=15))
+        self._uploader_tasks = [
+            asyncio.create_task(self._file_uploader()) for _ in range(num_upload_workers)
+        ]
 
     async def connect_and_register(self) -> None:
         """Connect to the WebSocket server and registers the device."""
@@ -121,10 +198,19 @@ class Client:
 
     async def stop(self) -> None:
         """Stop the client and close all tasks."""
-        async with self._task_lock:
-            for t in self.active_tasks.values():
+        for t in (self._listen_task, self._heartbeat_task):
+            if t is not None:
                 t.cancel()
-            self.active_tasks.clear()
+        self._listen_task = self._heartbeat_task = None
+        for t in self._uploader_tasks:
+            t.cancel()
+        self._uploader_tasks.clear()
+        # Snapshot then clear so cancellation callbacks never see a dict
+        # mutated mid-iteration
+        tasks = list(self.active_tasks.values())
+        self.active_tasks.clear()
+        for t in tasks:
+            t.cancel()
         await self.state_machine.transition(DeviceStatus.OFFLINE)
         await self.websocket_handler.close()
         log.info("WebSocket connection closed.")
@@ -149,28 +235,29 @@ class Client:
                 if message is None:
                     # Connection closed, try to reconnect
                     raise ConnectionError("Connection lost. Attempting to reconnect...")
-                data = json.loads(message)
-                command = data.get("command")
-
-                if command == "start":
-                    payload = AcquisitionPayload(**data.get("data", {}))
-                    await self.handle_start_command(payload)
-                elif command == "feedback":  # for feedback only 'message' is needed
-                    await self.handle_feedback(data.get("message"))
-                elif command == "pong":
-                    log.debug("Pong received.")
-                    continue
+                data = orjson.loads(message)
+                handler = self._dispatch.get(data.get("command"))
+                if handler is not None:
+                    try:
+                        await handler(data)
+                    except (ConnectionError, ConnectionClosed, OSError):
+                        raise  # connection failures take the reconnect path below
+                    except Exception as exc:
+                        # One malformed frame (e.g. a payload that fails
+                        # validation) must not kill the listener
+                        log.error("Error handling command %r: %s", data.get("command"), exc)
                 else:  # on error whole websocket message is needed
                     await self.handle_error(str(data))
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 log.error("Received invalid JSON message: %s", message)
-            except ConnectionError as e:
+            except (ConnectionError, ConnectionClosed, OSError) as e:
+                # Transient socket failures take this fast path: plain
+                # message formatting, no traceback walk, then reconnect.
+                # Anything else propagates to asyncio's default handler,
+                # which logs once instead of once per message.
                 if self.websocket_handler.websocket is None:
                     return  # No active connection, exit the loop
-                log.error(e)
-                await self.reconnect()
-            except Exception as e:
-                log.error("Error while receiving commands: %s", str(e))
+                log.error("%s", e)
                 await self.reconnect()
 
     async def _heartbeat(self, interval: int = 15) -> None:
@@ -183,17 +270,30 @@ class Client:
             try:
                 await asyncio.sleep(interval)
                 if self.websocket_handler.websocket:
-                    await self.websocket_handler.send_message(json.dumps({"command": "ping"}))
+                    await self.websocket_handler.send_message(self._ping_frame)
                     log.debug("Ping sent.")
             except asyncio.CancelledError:
                 break
-            except Exception as exc:
-                log.warning(f"Heartbeat send failed: {exc}")
+            except (ConnectionError, ConnectionClosed, OSError) as exc:
+                log.warning("Heartbeat send failed: %s", exc)
                 await self.reconnect()
 
     # --------------------------------------------------------------------------
     # Command handlers
 
+    async def _dispatch_start(self, data: dict[str, Any]) -> None:
+        """Validate the acquisition payload and hand off to the start handler."""
+        payload = AcquisitionPayload.model_validate(data.get("data", {}))
+        await self.handle_start_command(payload)
+
+    async def _dispatch_feedback(self, data: dict[str, Any]) -> None:
+        """For feedback only 'message' is needed."""
+        await self.handle_feedback(data.get("message"))
+
+    async def _dispatch_pong(self, data: dict[str, Any]) -> None:
+        """Acknowledge a heartbeat pong."""
+        log.debug("Pong received.")
+
     async def handle_start_command(self, payload: AcquisitionPayload) -> None:
         """Handle the 'start' command from the server to begin a scanning process.
 
@@ -212,26 +312,31 @@ class Client:
             )
             return
 
-        async with self._task_lock:
-            if str(payload.id) in self.active_tasks:
-                log.warning("Scan already running for task %s", payload.id)
-                return
+        # No await between the membership check and the insert, so the
+        # check-then-act is atomic on the event loop
+        if payload.id in self.active_tasks:
+            log.warning("Scan already running for task %s", payload.id)
+            return
 
-            # Create background task (non-blocking)
-            task = asyncio.create_task(self._run_scan_task(payload))
-            self.active_tasks[str(payload.id)] = task
+        # Create background task (non-blocking)
+        task = asyncio.create_task(self._run_scan_task(payload))
+        self.active_tasks[payload.id] = task
 
     async def _run_scan_task(self, payload: AcquisitionPayload) -> None:
         """Execute the scan asynchronously and manage its lifecycle."""
+        # Stringify once for the log messages and context dicts below
         task_id = str(payload.id)
         try:
-            if not callable(self.scan_callback):
+            # handle_start_command verified the callback before scheduling
+            # this task, but guard against it being cleared in between so a
+            # race degrades to a clean ERROR transition, not an AttributeError
+            if self.scan_callback is None:
                 log.error("Scan callback not defined.")
                 await self.state_machine.transition(
                     DeviceStatus.ERROR,
                     context={
                         "error_message": "Scan callback not defined.",
-                        "task_id": str(payload.id),
+                        "task_id": task_id,
                         "user_access_token": payload.access_token,
                     },
                 )
@@ -242,10 +347,10 @@ class Client:
                 "user_access_token": payload.access_token,
             })
             await self.scan_callback(payload)
-            log.info(f"Scan task {task_id} completed successfully.")
+            log.info("Scan task %s completed successfully.", task_id)
 
         except asyncio.CancelledError:
-            log.warning(f"Scan task {task_id} cancelled.")
+            log.warning("Scan task %s cancelled.", task_id)
             await self.state_machine.transition(
                 DeviceStatus.ERROR,
                 context={
@@ -255,7 +360,7 @@ class Client:
                 },
             )
         except Exception as exc:
-            log.exception(f"Scan task {task_id} failed: {exc}")
+            log.exception("Scan task %s failed: %s", task_id, exc)
             await self.state_machine.transition(
                 DeviceStatus.ERROR,
                 context={
@@ -265,17 +370,15 @@ class Client:
                 },
             )
         finally:
-            async with self._task_lock:
-                self.active_tasks.pop(task_id, None)
+            self.active_tasks.pop(payload.id, None)
             await self.state_machine.transition(DeviceStatus.ONLINE)
 
     async def cancel_scan(self, task_id: str) -> None:
         """Cancel an active scan."""
-        async with self._task_lock:
-            task = self.active_tasks.get(task_id)
-            if task:
-                task.cancel()
-                log.info(f"Cancelled scan task {task_id}")
+        task = self.active_tasks.get(UUID(task_id))
+        if task:
+            task.cancel()
+            log.info("Cancelled scan task %s", task_id)
 
     # --------------------------------------------------------------------------
     # Status and feedback
@@ -285,11 +388,13 @@ class Client:
 
         The registration data includes device details like ID, name, manufacturer, and location.
         """
-        registration_data = {
-            "command": "register",
-            "data": self.details.model_dump(),
-        }
-        await self.websocket_handler.send_message(json.dumps(registration_data))
+        if self._registration_frame is None:
+            registration_data = {
+                "command": "register",
+                "data": self.details.model_dump(),
+            }
+            self._registration_frame = orjson.dumps(registration_data).decode()
+        await self.websocket_handler.send_message(self._registration_frame)
         log.info("Device registration sent.")
 
     async def handle_feedback(self, message: str) -> None:
@@ -333,15 +438,26 @@ class Client:
         path = Path(file_path)
         if not name.endswith(path.suffix):
             name += path.suffix
-        await self.upload_queue.put((path, name, parameter, task_id, user_access_token))
-        msg = f"Queued file for upload: {file_path}"
-        log.info(msg)
+        # Back-pressure: block the scan callback while the queue is full
+        while len(self._upload_deque) >= self._upload_max:
+            self._upload_space.clear()
+            await self._upload_space.wait()
+        self._upload_deque.append((path, name, parameter, task_id, user_access_token))
+        self._upload_evt.set()
+        log.info("Queued file for upload: %s (queue depth %d)", file_path, len(self._upload_deque))
 
     async def _file_uploader(self) -> None:
-        """Background worker to upload files sequentially with retry logic."""
+        """Background worker to upload queued files with retry logic.
+
+        Several workers run concurrently; see Client.start().
+        """
         while True:
             try:
-                file_path, name, parameter, task_id, user_token = await self.upload_queue.get()
+                while not self._upload_deque:
+                    self._upload_evt.clear()
+                    await self._upload_evt.wait()
+                file_path, name, parameter, task_id, user_token = self._upload_deque.popleft()
+                self._upload_space.set()
                 attempt, success = 0, False
 
                 while not success and attempt < MAX_FILE_UPLOAD_ATTEMPTS:
@@ -349,16 +465,13 @@ class Client:
                     try:
                         await self._upload_file_direct(file_path, name, parameter, task_id, user_token)
                         success = True
-                        msg = f"Uploaded file {file_path} successfully."
-                        log.info(msg)
+                        log.info("Uploaded file %s successfully.", file_path)
                     except Exception as exc:
-                        msg = f"Upload failed (attempt {attempt}): {exc}"
-                        log.warning(msg)
+                        log.warning("Upload failed (attempt %d): %s", attempt, exc)
                         await asyncio.sleep(2**attempt)  # exponential backoff
 
                 if not success:
-                    msg = f"Giving up on file {file_path} after {attempt} attempts."
-                    log.error(msg)
+                    log.error("Giving up on file %s after %d attempts.", file_path, attempt)
                     await self.state_machine.transition(
                         DeviceStatus.ERROR,
                         context={"error_message": f"File upload failed after {attempt} attempts."},
@@ -366,9 +479,12 @@ class Client:
 
             except asyncio.CancelledError:
                 break
+            except (ConnectionError, ConnectionClosed, OSError) as exc:
+                log.error("Uploader error: %s", exc)
             except Exception as exc:
-                msg = f"Uploader error: {exc}"
-                log.error(msg)
+                # Failures outside the retry loop (e.g. an invalid state
+                # transition on the give-up path) must not kill the worker
+                log.exception("Uploader failed to process item: %s", exc)
 
     async def _upload_file_direct(
         self,
@@ -377,18 +493,24 @@ class Client:
         task_id: str,
         user_access_token: str,
     ) -> None:
-        """Perform actual streaming of a file to the backend."""
-        if not path.exists():
-            raise FileNotFoundError(path)
+        """Perform actual streaming of a file to the backend.
 
-        size = path.stat().st_size
+        The file is read once: every chunk is hashed and transmitted in the
+        same pass, and the digest follows the payload in a trailer frame
+        (announced via `digest_in_trailer` in the header). Compared to a
+        separate checksum pass this halves the bytes read from disk.
+        """
         ct = "application/x-ismrmrd+hdf5" if path.suffix == ".mrd" else "application/octet-stream"
 
-        sha = hashlib.sha256()
-        with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(CHUNK), b""):
-                sha.update(chunk)
-        sha_hex = sha.hexdigest()
+        # Compress compressible payloads before transmission; the wire then
+        # carries (and the trailer digest covers) the compressed bytes, and
+        # the server restores the original file on receipt. All filesystem
+        # touches (open, probe, stat) run in worker threads so a slow
+        # network-mounted scanner disk never stalls the event loop; a
+        # missing file surfaces as FileNotFoundError from the open.
+        compressed = await asyncio.to_thread(_compress_if_worthwhile, path)
+        send_path = compressed if compressed is not None else path
+        size = (await asyncio.to_thread(send_path.stat)).st_size
 
         header = {
             "command": "file-transfer",
@@ -397,14 +519,111 @@ class Client:
             "filename": name,
             "size_bytes": size,
             "content_type": ct,
-            "sha256": sha_hex,
+            "digest_in_trailer": True,
             "device_parameter": parameter,
         }
+        if compressed is not None:
+            header["content_encoding"] = "zstd"
+
+        try:
+            await self._send_payload(header, send_path, size)
+        finally:
+            if compressed is not None:
+                await asyncio.to_thread(compressed.unlink)
+
+    async def _open_data_channel(self) -> WebSocketHandler:
+        """Open a dedicated bulk-transfer connection for one upload.
 
-        await self.websocket_handler.send_message(json.dumps(header))
-        with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(CHUNK), b""):
-                await self.websocket_handler.send_message(chunk)
+        Bulk payloads and control traffic no longer share a socket: a
+        multi-GB transfer cannot starve status updates or commands, and
+        uploader workers stream fully in parallel. The Device-Channel header
+        tells the server not to register this socket as the command channel.
+        """
+        handler = WebSocketHandler(
+            uri=self.websocket_uri,
+            device_id=self.device_id,
+            device_token=self.device_token,
+            reconnect_delay=self.reconnect_delay,
+            ca_file=self.websocket_handler.ca_file,
+            channel="data",
+        )
+        await handler.connect()
+        return handler
+
+    async def _send_payload(self, header: dict[str, Any], path: Path, size: int) -> None:
+        """Transmit header, mapped payload and digest trailer on a data channel."""
+        # hashlib releases the GIL and hits OpenSSL's hardware SHA path for
+        # updates of this size; binding the hot methods once keeps the loop
+        # body to the two calls that matter.
+        sha = hashlib.sha256()
+        update = sha.update
+        data_handler = await self._open_data_channel()
+        try:
+            ws = data_handler.websocket
+            if ws is None:
+                raise ConnectionError("Data channel closed before transfer started")
+            if getattr(ws, "transport", None) is not None:
+                # Allow ~2 frames to sit in the transport buffer before
+                # drain() blocks, so the next chunk is prepared and written
+                # while the previous one is still leaving the socket. This
+                # pipelines at the transport layer; issuing send() calls
+                # from several tasks instead could reorder frames.
+                ws.transport.set_write_buffer_limits(high=2 * CHUNK)
+            # Payload frames go through the protocol's send directly; the
+            # handler wrapper's per-call connection check, try/except and
+            # failure sleep belong on control frames, not in the chunk loop
+            # — the retry loop above already logs and backs off on failure.
+            send = ws.send
+            await data_handler.send_message(orjson.dumps(header).decode())
+            # The connection is always TLS, so kernel-side sendfile is not
+            # an option; instead the file is mapped and every chunk is a
+            # zero-copy memoryview window over the kernel page cache — no
+            # read buffer and no per-chunk bytes allocation at all.
+            if size:  # mmap rejects empty files
+                with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):  # POSIX only
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    mv = memoryview(mm)
+                    in_flight: asyncio.Task[None] | None = None
+                    chunk: memoryview | None = None    # hashed / being queued
+                    sending: memoryview | None = None  # owned by in_flight
+                    try:
+                        for off in range(0, size, CHUNK):
+                            chunk = mv[off:off + CHUNK]
+                            # Hash first, in a worker thread: hashlib
+                            # releases the GIL and the hash walk faults the
+                            # chunk's pages in off the event loop, so the
+                            # send below copies from resident memory and
+                            # never blocks the loop on disk. The hash of
+                            # this chunk overlaps with the previous frame
+                            # still draining.
+                            await asyncio.to_thread(update, chunk)
+                            if in_flight is not None:
+                                await in_flight
+                                if sending is not None:
+                                    sending.release()
+                            in_flight = asyncio.create_task(send(chunk))
+                            sending, chunk = chunk, None
+                        if in_flight is not None:
+                            await in_flight
+                            in_flight = None
+                    finally:
+                        if in_flight is not None:
+                            # The views must outlive any frame still sending
+                            await asyncio.wait([in_flight])
+                        # Every exported slice must be released before the
+                        # with-block closes the map, or mm.close() raises
+                        # BufferError over the live exports
+                        if sending is not None:
+                            sending.release()
+                        if chunk is not None:
+                            chunk.release()
+                        mv.release()
+            trailer = {"command": "file-transfer-complete", "sha256": sha.hexdigest()}
+            await data_handler.send_message(orjson.dumps(trailer).decode())
+        finally:
+            # Free the connection's buffers as soon as the upload is done
+            await data_handler.close()
 
     # --------------------------------------------------------------------------
     # Handler registration
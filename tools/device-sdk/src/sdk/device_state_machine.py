@@ -11,10 +11,10 @@ multiple asynchronous tasks interact with the same device instance.
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 from typing import TYPE_CHECKING, Any, ClassVar
 
+import orjson
 from scanhub_libraries.models import DeviceStatus
 
 if TYPE_CHECKING:
@@ -22,6 +22,12 @@ if TYPE_CHECKING:
 
 log = logging.getLogger("DeviceStateMachine")
 
+# Progress updates arriving faster than this window are coalesced into one
+# frame carrying the latest values
+_COALESCE_WINDOW = 0.05
+
+__all__ = ["DeviceStateMachine", "InvalidStateTransitionError"]
+
 
 class InvalidStateTransitionError(Exception):
     """Raised when an invalid state transition is attempted."""
@@ -30,11 +36,11 @@ class InvalidStateTransitionError(Exception):
 class DeviceStateMachine:
     """Finite state machine for device lifecycle management."""
 
-    _VALID_TRANSITIONS: ClassVar[dict[DeviceStatus, list[DeviceStatus]]] = {
-        DeviceStatus.OFFLINE: [DeviceStatus.ONLINE],
-        DeviceStatus.ONLINE: [DeviceStatus.BUSY, DeviceStatus.OFFLINE],
-        DeviceStatus.BUSY: [DeviceStatus.ONLINE, DeviceStatus.ERROR, DeviceStatus.OFFLINE],
-        DeviceStatus.ERROR: [DeviceStatus.ONLINE, DeviceStatus.OFFLINE],
+    _VALID_TRANSITIONS: ClassVar[dict[DeviceStatus, tuple[DeviceStatus, ...]]] = {
+        DeviceStatus.OFFLINE: (DeviceStatus.ONLINE,),
+        DeviceStatus.ONLINE: (DeviceStatus.BUSY, DeviceStatus.OFFLINE),
+        DeviceStatus.BUSY: (DeviceStatus.ONLINE, DeviceStatus.ERROR, DeviceStatus.OFFLINE),
+        DeviceStatus.ERROR: (DeviceStatus.ONLINE, DeviceStatus.OFFLINE),
     }
 
     def __init__(self, client: Client) -> None:
@@ -47,6 +53,12 @@ class DeviceStateMachine:
         self.client = client
         self._state: DeviceStatus = DeviceStatus.OFFLINE
         self._lock = asyncio.Lock()
+        self._pending_ctx: dict[str, Any] | None = None
+        self._flush_task: asyncio.Task[None] | None = None
+        # Context-free status frames are identical per status; serialize each
+        # once on first use (plain ONLINE/OFFLINE transitions bracket every
+        # scan and reconnect)
+        self._plain_frames: dict[DeviceStatus, str] = {}
 
     # ------------------------------------------------------------------
     # Core methods
@@ -70,29 +82,59 @@ class DeviceStateMachine:
                 log.warning(msg)
                 raise InvalidStateTransitionError(msg)
 
+            # A state change supersedes any progress frame still waiting in
+            # the coalescing window
+            if self._flush_task is not None and not self._flush_task.done():
+                self._flush_task.cancel()
+            self._pending_ctx = None
             self._state = new_state
             await self._send_status(new_state, context)
-            msg = f"[STATE] Transitioned to {new_state.value}"
-            log.info(msg)
+            log.info("[STATE] Transitioned to %s", new_state.value)
 
     async def update_context(self, context: dict[str, Any]) -> None:
         """
         Update contextual data (e.g., progress) without changing state.
 
         Useful when BUSY state persists but progress updates are frequent.
+        Updates are coalesced: within a short window only the latest context
+        is sent, so a scan emitting progress at hundreds of Hz produces
+        frames at a bounded rate with the same final information.
         """
-        async with self._lock:
-            await self._send_status(self._state, context)
-            msg = f"[STATE] Context update in {self._state.value}: {context}"
-            log.debug(msg)
+        self._pending_ctx = context
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending_context())
+
+    async def _flush_pending_context(self) -> None:
+        """Send the most recent pending context after each coalescing window.
+
+        Loops until the pending slot stays empty, so an update that arrives
+        while a send is in flight is picked up by the next iteration rather
+        than dropped.
+        """
+        while (context := self._pending_ctx) is not None:
+            await asyncio.sleep(_COALESCE_WINDOW)
+            context = self._pending_ctx
+            self._pending_ctx = None
+            if context is None:
+                return
+            async with self._lock:
+                await self._send_status(self._state, context)
+                # Formatting the context dict is not free; skip it unless
+                # debug logging is actually emitting
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("[STATE] Context update in %s: %s", self._state.value, context)
 
     # ------------------------------------------------------------------
     # Internal helpers
 
     def _is_valid_transition(self, new_state: DeviceStatus) -> bool:
-        """Check if a transition is allowed from the current state."""
-        valid_next = self._VALID_TRANSITIONS.get(self._state, [])
-        return new_state in valid_next
+        """Check if a transition is allowed from the current state.
+
+        One AND against the packed mask instead of a dict lookup (with its
+        empty-list default allocation) plus a linear membership scan.
+        """
+        bit = _STATUS_INDEX[self._state] * _N_STATUS + _STATUS_INDEX[new_state]
+        return bool(_TRANSITIONS_MASK & (1 << bit))
 
     async def _send_status(self, status: DeviceStatus, context: dict[str, Any] | None = None) -> None:
         """Propagate state/context to backend."""
@@ -104,10 +146,25 @@ class DeviceStateMachine:
         except Exception as e:
             # Don't kill the scan task because of a temporary socket issue.
             # Local state is still updated; the next progress or state update after reconnect will re-sync.
-            log.warning(f"Suppressed send failure during {status.value}: {e}")
+            log.warning("Suppressed send failure during %s: %s", status.value, e)
 
     def _build_status_message(self, status: DeviceStatus, context: dict[str, Any]) -> str:
-        """Format a JSON message for WebSocket transmission."""
+        """Format a JSON message for WebSocket transmission.
+
+        Serialized with orjson (C-accelerated) — progress updates during a
+        scan make this the highest-frequency frame the SDK emits.
+        """
+        if not context:
+            if (frame := self._plain_frames.get(status)) is None:
+                frame = orjson.dumps({
+                    "command": "update_status",
+                    "status": status.value,
+                    "data": {},
+                    "task_id": None,
+                    "user_access_token": None,
+                }).decode()
+                self._plain_frames[status] = frame
+            return frame
         message = {
             "command": "update_status",
             "status": status.value,
@@ -115,4 +172,15 @@ class DeviceStateMachine:
             "task_id": context.get("task_id"),
             "user_access_token": context.get("user_access_token"),
         }
-        return json.dumps(message)
+        return orjson.dumps(message).decode()
+
+
+# _VALID_TRANSITIONS stays the readable source of truth; for the per-call
+# check it is packed once into an int with bit (src_idx * n + dst_idx) set
+# for every allowed transition.
+_STATUS_INDEX = {status: idx for idx, status in enumerate(DeviceStatus)}
+_N_STATUS = len(_STATUS_INDEX)
+_TRANSITIONS_MASK = 0
+for _src, _targets in DeviceStateMachine._VALID_TRANSITIONS.items():
+    for _dst in _targets:
+        _TRANSITIONS_MASK |= 1 << (_STATUS_INDEX[_src] * _N_STATUS + _STATUS_INDEX[_dst])
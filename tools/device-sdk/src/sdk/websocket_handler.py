@@ -40,6 +40,7 @@ class WebSocketHandler:
         device_token: str,
         reconnect_delay: int = 5,
         ca_file: str | None = None,
+        channel: str | None = None,
     ) -> None:
         """Initialize the WebSocketHandler instance.
 
@@ -48,6 +49,10 @@ class WebSocketHandler:
             reconnect_delay (int, optional): Time in seconds to wait before
                                              retrying a failed connection.
                                              Defaults to 5.
+            channel (str | None): Optional channel designation sent in the
+                                  handshake ("data" marks a bulk-transfer
+                                  connection the server keeps out of its
+                                  control-channel registry).
         """
         self.uri: str = uri
         self.device_id: str = device_id
@@ -55,6 +60,7 @@ class WebSocketHandler:
         self.websocket: WebSocketClientProtocol | None = None
         self.reconnect_delay: int = reconnect_delay
         self.ca_file: str | None = ca_file
+        self.channel: str | None = channel
         self.logger: logging.Logger = logging.getLogger("WebSockerHandler")
 
     async def connect(self) -> None:
@@ -66,12 +72,15 @@ class WebSocketHandler:
         Logs specific connection-related errors and retries accordingly.
         """
         print("Device ID:", self.device_id)
+        extra_headers = {
+            "Device-Id": str(self.device_id),
+            "Device-Token": str(self.device_token),
+        }
+        if self.channel is not None:
+            extra_headers["Device-Channel"] = self.channel
         self.websocket = await connect(
             self.uri,
-            extra_headers={
-                "Device-Id": str(self.device_id),
-                "Device-Token": str(self.device_token),
-            },
+            extra_headers=extra_headers,
             ssl=ssl.create_default_context(cafile=self.ca_file),
             max_size=None,
         )
@@ -1,6 +1,7 @@
 """Example usage of the Device SDK for a simulated scanning process."""
 import asyncio
 
+import sdk
 from sdk.client import Client
 from scanhub_libraries.models import AcquisitionPayload, DeviceDetails, CalibrationType
 import os
@@ -113,6 +114,6 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        sdk.run(main())
     except KeyboardInterrupt:
         print("Keyboard interrupt received.")